@@ -12,7 +12,34 @@ __author__ = "Danial Chekani"
 __email__ = "danialchekani@arizona.edu"
 __status__ = "Dev"
 
-class Node():
+import sys
+
+# Node types, interned so every node shares one string object per type
+JUNCTION_NODE = sys.intern('Junction Node')
+PICKUP_NODE = sys.intern('Pickup Node')
+DELIVERY_NODE = sys.intern('Delivery Node')
+DEPOT_NODE = sys.intern('Depot Node')
+
+# Color used to plot each node type, nodes of any other type are drawn in gray
+NODE_COLORS = {PICKUP_NODE: 'green', DELIVERY_NODE: 'blue', DEPOT_NODE: 'red'}
+
+class BaseModel():
+    """
+    Base class of the models. Attributes are stored in __slots__ instead of a 
+    per-instance __dict__, which lowers memory use and speeds up attribute access
+
+    Methods
+    -------
+    to_dict()
+        returns the attributes that are set as a dictionary
+    """
+
+    __slots__ = ()
+
+    def to_dict(self) -> dict:
+        return {attr: getattr(self, attr) for attr in self.__slots__ if hasattr(self, attr)}
+
+class Node(BaseModel):
     """
     A class used to represent a node in the network
 
@@ -28,8 +55,12 @@ class Node():
         The type of the node (e.g., 'junction_node', 'depot_node').
     name : str, optional
         The name of the node.
+    color : str
+        The color used to plot the node, based on its type.
     """
 
+    __slots__ = ('node_id', 'x', 'y', 'node_type', 'name', 'color')
+
     def __init__(self, node_id : int, x : float, y : float, 
                  node_type : str, name : str = None) -> None:
         self.node_id = node_id
@@ -37,8 +68,9 @@ class Node():
         self.y = y
         self.node_type = node_type
         self.name = name
+        self.color = NODE_COLORS.get(node_type, 'gray')
 
-class Edge():
+class Edge(BaseModel):
     """
     A class used to represent an edge in the network
 
@@ -56,6 +88,8 @@ class Edge():
         The distance of the edge in miles.
     """
 
+    __slots__ = ('edge_id', 'origin_id', 'destination_id', 'travel_time', 'distance')
+
     def __init__(self, edge_id : int, origin_id : int, destination_id : int,
                  travel_time : float, distance : float) -> None:
         self.edge_id = edge_id
@@ -64,7 +98,7 @@ class Edge():
         self.travel_time = travel_time
         self.distance = distance
 
-class Vehicle():
+class Vehicle(BaseModel):
     """
     A class used to represent a vehicle
 
@@ -82,6 +116,8 @@ class Vehicle():
         The type of the vehicle.
     """
 
+    __slots__ = ('vehicle_id', 'origin_id', 'destination_id', 'capacity', 'bus_type')
+
     def __init__(self, vehicle_id : int, origin_id : int, 
                  destination_id : int, capacity : int, bus_type = int) -> None:
         self.vehicle_id = vehicle_id
@@ -90,7 +126,7 @@ class Vehicle():
         self.capacity = capacity
         self.bus_type = bus_type
 
-class Request():
+class Request(BaseModel):
     """
     A class used to represent a request
 
@@ -118,6 +154,11 @@ class Request():
         The service time at arrival in minutes.
     """
 
+    __slots__ = ('request_id', 'origin_id', 'destination_id', 'num_of_people',
+                 'earliest_departure_minutes', 'latest_departure_minutes', 
+                 'departure_service_time', 'earliest_arrival_minutes', 
+                 'latest_arrival_minutes', 'arrival_service_time')
+
     def __init__(self, request_id : int, origin_id : int, destination_id : int, 
                  num_of_people : int, earliest_departure_minutes : float,
                  latest_departure_minutes : float, departure_service_time : float,
@@ -134,7 +175,7 @@ class Request():
         self.latest_arrival_minutes = latest_arrival_minutes
         self.arrival_service_time = arrival_service_time
 
-class Movement():
+class Movement(BaseModel):
     """
     A class used to represent a link in the vehicles trip
 
@@ -166,6 +207,9 @@ class Movement():
         The status of the movement.
     """
 
+    __slots__ = ('origin_id', 'destination_id', 't1', 't2', 'l1', 'l2', 'request_id', 
+                 'path', 'path_cost', 'travel_time', 'distance', 'status')
+
     def __init__(self, origin_id: int, destination_id: int, t1: str, t2: str, 
                      l1: int, l2: int, request_id: int, path: list, 
                      path_cost: float, tt: float, dist: float, status: str) -> None:
@@ -182,7 +226,7 @@ class Movement():
         self.distance = dist
         self.status = status
 
-class Trip():
+class Trip(BaseModel):
     """
     A class used to describe the full trip vehicles takes
 
@@ -205,6 +249,9 @@ class Trip():
         sorts the movements into movements_sorted and deletes movements dict
     """
 
+    __slots__ = ('movements', 'movements_sorted', 'total_cost', 
+                 'total_distance', 'total_travel_time')
+
     def __init__(self) -> None:
         self.movements = {}
         self.movements_sorted = []
@@ -213,11 +260,13 @@ class Trip():
         self.total_travel_time = 0
 
     def sort_movements(self, n) -> None:
-        # connect edges together to sort the trip
+        # connect edges together to sort the trip, walking the dict 
+        # without popping so it is never resized
+        movements = self.movements
         next_i = 2*n
-        while len(self.movements) > 0:
-            item = self.movements.pop(next_i)
+        while next_i in movements:
+            item = movements[next_i]
             next_i = item.destination_id
             self.movements_sorted.append(item)
 
-        del self.__dict__["movements"]
\ No newline at end of file
+        del self.movements
\ No newline at end of file
@@ -9,8 +9,10 @@ graph structures for solving the Vehicle Routing Problem with Time Window Constr
 It includes functions for reading and processing node, edge, request, and vehicle data from CSV files.
 
 Functions included:
-- get_full_graph: Read input data and construct the full graph.
+- get_full_graph: Read input data and construct the full graph, reusing a cached parse when the input files are unchanged.
 - convert_to_minutes: Convert a time string in HH:MM format to total minutes.
+- convert_columns_to_minutes: Convert columns of time strings to total minutes.
+- read_csv_columns: Read a CSV file column by column.
 - read_nodes: Read node data from a CSV file and classify nodes based on requests and vehicles.
 - read_edges: Read edge data from a CSV file.
 - create_graph: Create a directed graph using nodes and edges data.
@@ -19,7 +21,13 @@ Functions included:
 
 Dependencies:
 - csv: For reading CSV files.
+- functools: For memoizing repeated time conversions.
+- hashlib: For keying the parsed data cache on the input files and the parsing code.
+- pathlib.Path: For locating the parsed data cache.
+- pickle: For storing the parsed data cache.
+- itertools: For transposing rows into columns.
 - networkx: For graph operations.
+- numpy: For node position arrays.
 """
 
 __author__ = "Danial Chekani"
@@ -27,14 +35,30 @@ __email__ = "danialchekani@arizona.edu"
 __status__ = "Dev"
 
 import csv
-from typing import Dict, Tuple
+import hashlib
+from functools import lru_cache
+import pickle
+from pathlib import Path
+from itertools import repeat, zip_longest
+from typing import Dict, List, Tuple
 import networkx as nx
+import numpy as np
 
-from Models import Edge, Node, Request, Vehicle
+from Models import (DELIVERY_NODE, DEPOT_NODE, JUNCTION_NODE, NODE_COLORS, PICKUP_NODE,
+                    Edge, Node, Request, Vehicle)
+
+# The cache is kept in the user's own cache directory and never in the input
+# directory, so a shared sample folder can not carry a pickle that runs on load
+CACHE_DIR = Path.home() / ".cache" / "vrppdtw"
+# The parsed graph depends on the code that builds it, so the source 
+# of these modules is part of the cache key along with the input files
+CACHE_SOURCES = (Path(__file__), Path(__file__).with_name("Models.py"))
 
 def get_full_graph(base_directory: str) -> Tuple[nx.DiGraph, Dict[int, Request], Dict[int, Vehicle]]:
     """
     Read input data including vehicles, requests, nodes, and edges, and construct the full graph.
+    The parsed result is cached in the user's cache directory and reused as long as 
+    the content of the input files and the parsing code do not change.
 
     Parameters
     ----------
@@ -48,15 +72,46 @@ def get_full_graph(base_directory: str) -> Tuple[nx.DiGraph, Dict[int, Request],
     """
     nodes_file = base_directory + "Nodes.csv"
     edges_file = base_directory + "Edges.csv"
-    requests = get_requests(base_directory + "Requests.csv")
-    vehicles = get_vehicles(base_directory + "Vehicles.csv")
+    requests_file = base_directory + "Requests.csv"
+    vehicles_file = base_directory + "Vehicles.csv"
+
+    # Key the cache on the content of the parsing code and the input files, 
+    # so edited inputs and graphs built by older code are reparsed
+    hasher = hashlib.blake2b(digest_size=16)
+    for filename in (*CACHE_SOURCES, nodes_file, edges_file, requests_file, vehicles_file):
+        with open(filename, 'rb') as file:
+            hasher.update(file.read())
+    key = hasher.hexdigest()
+    cache_file = CACHE_DIR / f"{key}.pkl"
+
+    # A missing or unreadable cache falls back to parsing the input files
+    try:
+        with open(cache_file, 'rb') as file:
+            cached_key, result = pickle.load(file)
+        if cached_key == key:
+            return result
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        pass
+
+    requests = get_requests(requests_file)
+    vehicles = get_vehicles(vehicles_file)
     graph = create_graph(nodes_file, edges_file, requests, vehicles)
+    result = (graph, requests, vehicles)
+
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with open(cache_file, 'wb') as file:
+            pickle.dump((key, result), file, protocol=pickle.HIGHEST_PROTOCOL)
+    except (OSError, pickle.PicklingError):
+        pass
 
-    return graph, requests, vehicles
+    return result
 
+@lru_cache(maxsize=4096)
 def convert_to_minutes(time_str: str) -> int:
     """
     Convert a time string in HH:MM format to total minutes.
+    Results are memoized, as the same few time strings repeat across rows.
 
     Parameters
     ----------
@@ -68,18 +123,66 @@ def convert_to_minutes(time_str: str) -> int:
     int
         The total time in minutes.
     """
-    parts = time_str.split(':')
-    
-    if len(parts) == 2:
-        hours = int(parts[0])
-        minutes = int(parts[1])
-    else:
-        hours = int(time_str)
-        minutes = 0
+    # partition splits once without building a list, minutes is empty for just hours
+    hours, _, minutes = time_str.partition(':')
     
-    total_minutes = hours * 60 + minutes
+    total_minutes = int(hours) * 60 + (int(minutes) if minutes else 0)
     return total_minutes
 
+def convert_columns_to_minutes(columns: List[tuple]) -> np.ndarray:
+    """
+    Convert columns of time strings in HH:MM format to total minutes, 
+    all columns at once in a single vectorized pass.
+
+    Parameters
+    ----------
+    columns : list
+        A list of columns, each a tuple of time strings in HH:MM format or just hours.
+
+    Returns
+    -------
+    np.ndarray
+        An integer array of shape (number of columns, number of rows) with the 
+        total time in minutes of every value.
+    """
+    times = np.array(columns, dtype=str)
+    if times.size == 0:
+        return np.zeros(times.shape, dtype=np.int64)
+
+    # Values without a ':' only have hours, their minutes part is empty
+    parts = np.char.partition(times, ':')
+    hours = parts[..., 0].astype(np.int64)
+    minutes = np.where(parts[..., 2] == '', '0', parts[..., 2]).astype(np.int64)
+
+    return hours * 60 + minutes
+
+def read_csv_columns(filename: str, num_columns: int) -> List[tuple]:
+    """
+    Read a CSV file with a header line and return its values column by column, 
+    so each column can be converted to its type in a single pass.
+
+    Parameters
+    ----------
+    filename : str
+        The file path to the CSV file.
+    num_columns : int
+        The number of columns to return.
+
+    Returns
+    -------
+    list
+        A list with a tuple of string values for each of the first num_columns 
+        columns. Cells missing from shorter rows are None.
+    """
+    with open(filename, 'r') as file:
+        reader = csv.reader(file)
+        next(reader, None)
+        rows = [line for line in reader if line]
+
+    columns = list(zip_longest(*rows))[:num_columns]
+    columns.extend([(None,) * len(rows)] * (num_columns - len(columns)))
+    return columns
+
 def read_nodes(nodes_file: str, requests: Dict[int, Request], 
                vehicles: Dict[int, Vehicle]) -> Dict[int, Node]:
     """
@@ -100,22 +203,27 @@ def read_nodes(nodes_file: str, requests: Dict[int, Request],
     dict
         A dictionary where keys are node IDs and values are node attributes.
     """
-    nodes = {}
-    with open(nodes_file, 'r') as file:
-        reader = csv.reader(file)
-        next(reader, None)
-        for line in reader:
-            node_name = line[3] if len(line) > 3 else None
-            node = Node(int(line[0]), float(line[1]), float(line[2]), 'Junction Node' ,node_name)
-            nodes[node.node_id] = node
-
-    for _, request in requests.items():
-        nodes[request.origin_id].node_type = 'Pickup Node'
-        nodes[request.destination_id].node_type = 'Delivery Node'
-
-    for _, vehicle in vehicles.items():
-        nodes[vehicle.origin_id].node_type = 'Depot Node'
-        nodes[vehicle.destination_id].node_type = 'Depot Node'
+    node_ids, xs, ys, names = read_csv_columns(nodes_file, 4)
+    nodes = {node.node_id: node 
+             for node in map(Node, map(int, node_ids), map(float, xs), map(float, ys), 
+                             repeat(JUNCTION_NODE), names)}
+
+    # Classify nodes with a single write per node. Depots are assigned
+    # last so they take precedence, as pickup and delivery nodes did before
+    node_types = {}
+    for request in requests.values():
+        node_types[request.origin_id] = PICKUP_NODE
+        node_types[request.destination_id] = DELIVERY_NODE
+
+    for vehicle in vehicles.values():
+        node_types[vehicle.origin_id] = DEPOT_NODE
+        node_types[vehicle.destination_id] = DEPOT_NODE
+
+    # Resolve plotting colors once here instead of on every draw
+    for node_id, node_type in node_types.items():
+        node = nodes[node_id]
+        node.node_type = node_type
+        node.color = NODE_COLORS[node_type]
 
     return nodes
 
@@ -134,14 +242,11 @@ def read_edges(filename: str) -> Dict[int, Edge]:
     dict
         A dictionary where keys are edge IDs and values are edge attributes.
     """
-    edges = {}
-    with open(filename, 'r') as file:
-        reader = csv.reader(file)
-        next(reader, None)
-        for line in reader:
-            edge = Edge(line[0], int(line[1]), int(line[2]), float(line[3]), float(line[4]))
-            edges[edge.edge_id] = edge
-            
+    edge_ids, origins, destinations, travel_times, distances = read_csv_columns(filename, 5)
+    edges = {edge.edge_id: edge 
+             for edge in map(Edge, edge_ids, map(int, origins), map(int, destinations), 
+                             map(float, travel_times), map(float, distances))}
+
     return edges
 
 def create_graph(nodes_file: str, edges_file: str, requests: Dict[int, Request], 
@@ -163,22 +268,35 @@ def create_graph(nodes_file: str, edges_file: str, requests: Dict[int, Request],
     Returns
     -------
     nx.DiGraph
-        A directed graph with nodes and edges added.
+        A directed graph with nodes and edges added. The (x, y) position of 
+        each node is stored in G.graph['pos'] as a dict and in G.graph['pos_arr'] 
+        as an array of shape (number of nodes, 2). Edge labels used for plotting 
+        are stored in G.graph['edge_labels'], once for each pair of nodes.
     """
     G = nx.DiGraph()
     
     nodes = read_nodes(nodes_file, requests, vehicles)
     edges = read_edges(edges_file)
     
-    for index, (_, node) in enumerate(nodes.items(), start=0):
-        G.add_node(index, **node.__dict__)
-
-    # Add edges in both directions
-    for index, (key, edge) in enumerate(edges.items(), start=0):
-        G.add_edge(edge.origin_id, edge.destination_id, travel_time=edge.travel_time, 
-                   distance=edge.distance, id=edge.edge_id)
-        G.add_edge(edge.destination_id, edge.origin_id, travel_time=edge.travel_time, 
-                   distance=edge.distance, id=edge.edge_id)
+    G.add_nodes_from([(index, node.to_dict()) for index, node in enumerate(nodes.values())])
+
+    # Node positions are static, store them once for plotting. pos_arr holds the 
+    # same positions as a contiguous array where row i is the position of node i
+    G.graph['pos'] = {node: (data['x'], data['y']) for node, data in G.nodes(data=True)}
+    G.graph['pos_arr'] = np.array(list(G.graph['pos'].values()), dtype=np.float64)
+
+    # Add edges in both directions in a single bulk call. The graph stays directed
+    # so the shortest paths and the plotted arcs keep their orientation
+    edge_rows = [(edge.origin_id, edge.destination_id, 
+                  {'travel_time': edge.travel_time, 'distance': edge.distance, 
+                   'weight': edge.distance, 'id': edge.edge_id}) 
+                 for edge in edges.values()]
+    G.add_edges_from(edge_rows)
+    G.add_edges_from([(v, u, attrs) for u, v, attrs in edge_rows])
+
+    # Edge weights are static, store the plot labels once. Both directions of an 
+    # edge share a label, so only one is kept for each pair of nodes
+    G.graph['edge_labels'] = {(u, v): weight for u, v, weight in G.edges.data('weight') if u < v}
     
     return G
 
@@ -199,16 +317,11 @@ def get_requests(filename: str) -> Dict[int, Request]:
     dict
         A dictionary where keys are request IDs and values are tuples containing request details.
     """
-    requests = {}
-    with open(filename, 'r') as file:
-        reader = csv.reader(file)
-        next(reader, None)
-        for line in reader:
-            request = Request(int(line[0]), int(line[1]), int(line[2]), int(line[3]),
-                              convert_to_minutes(line[4]), convert_to_minutes(line[5]),
-                              convert_to_minutes(line[6]), convert_to_minutes(line[7]),
-                              convert_to_minutes(line[8]), convert_to_minutes(line[9]))
-            requests[request.request_id] = request
+    columns = read_csv_columns(filename, 10)
+    int_columns = [map(int, column) for column in columns[:4]]
+    time_columns = convert_columns_to_minutes(columns[4:10]).tolist()
+    requests = {request.request_id: request 
+                for request in map(Request, *int_columns, *time_columns)}
 
     return requests
 
@@ -227,13 +340,7 @@ def get_vehicles(filename: str) -> Dict[int, Vehicle]:
     dict
         A dictionary where keys are vehicle IDs and values are tuples containing vehicle details.
     """
-    vehicles = {}
-    with open(filename, 'r') as file:
-        reader = csv.reader(file)
-        next(reader, None)
-        for line in reader:
-            vehicle = Vehicle(int(line[0]), int(line[1]), int(line[2]),
-                              int(line[3]), int(line[4]))
-            vehicles[vehicle.vehicle_id] = vehicle
+    int_columns = [map(int, column) for column in read_csv_columns(filename, 5)]
+    vehicles = {vehicle.vehicle_id: vehicle for vehicle in map(Vehicle, *int_columns)}
 
     return vehicles
\ No newline at end of file
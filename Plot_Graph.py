@@ -10,20 +10,23 @@ the base graph, overall solution, and step-by-step solution of the problem.
 
 Functions included:
 - get_node_label: Get label of a node.
+- get_node_colors: Get colors of nodes based on their type.
+- get_node_texts: Get positions and texts of node ID labels.
 - base_graph: Plot the graph including nodes and edges.
+- path_to_segments: Get the line segments of a path of nodes.
+- draw_arcs: Draw directed arcs as batched line and arrow collections.
 - plot_base_graph: A function to call base_graph.
 - plot_overall_solution: Plot VRPPDTW solution without graph edges.
 - on_key_press: Control the flow of the program.
 - add_info_to_plot: Add text info to the plot
 
 Dependencies:
-- pillow: For creating images and Gifs.
+- pillow: For writing Gifs through matplotlib's PillowWriter.
 - matplotlib: For plotting the data.
 - networkx: For graph operations.
-- pathlib.Path: For directory path manipulations.
+- numpy: For node coordinate arrays.
 - os: For getting directories.
 - sys: For quitting the program.
-- json: For reading and writing JSON files.
 - plot_step_by_step: Plot the solution step by step and create Gif.
 """
 
@@ -32,16 +35,29 @@ __email__ = "danialchekani@arizona.edu"
 __status__ = "Dev"
 
 import os
-from pathlib import Path
 import sys
-from PIL import Image
 from Parsing import get_full_graph
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
+from matplotlib.animation import PillowWriter
+from matplotlib.collections import LineCollection
 import networkx as nx
-import json
+import numpy as np
+from typing import Tuple
 
-from Utils import get_dirs
+from Models import JUNCTION_NODE, NODE_COLORS
+from Utils import get_dirs, load_json
+
+# Edge labels are only drawn for graphs with at most this many edges
+MAX_EDGE_LABELS = 200
+# Node ID labels are only drawn for graphs with at most this many nodes
+MAX_NODE_LABELS = 500
+
+# Boxes of the step info texts, shared by every frame
+STATUS_BBOX = dict(boxstyle="round", facecolor='black', edgecolor="none")
+LOAD_BBOX = dict(boxstyle="round", facecolor='purple', edgecolor="none")
+TIME_BBOX = dict(boxstyle="round", facecolor='blue', edgecolor="none")
+COST_BBOX = dict(boxstyle="round", facecolor='brown', edgecolor="none")
 
 def get_node_label(node : tuple) -> str:
     """
@@ -57,12 +73,48 @@ def get_node_label(node : tuple) -> str:
     str
         The label for the node.
     """
-    if node[1]['name'] != None:
-        return node[1]['name']
-    else:
-        return ""
+    name = node[1]['name']
+    return name if name is not None else ""
+
+def get_node_colors(G: nx.DiGraph) -> list:
+    """
+    Get the color of every node in the graph, as resolved from its type 
+    when the graph was parsed.
+
+    Parameters
+    ----------
+    G : nx.DiGraph
+        The graph object.
+
+    Returns
+    -------
+    list
+        A list of colors ordered the same as G.nodes().
+    """
+    return [node_data['color'] for _, node_data in G.nodes(data=True)]
+
+def get_node_texts(G: nx.DiGraph, pos: dict) -> list:
+    """
+    Get the position and text of the ID label drawn on every node.
+
+    Parameters
+    ----------
+    G : nx.DiGraph
+        The graph object.
+    pos : dict
+        A dictionary containing node positions.
+
+    Returns
+    -------
+    list
+        A list of (x, y, text) tuples, one per node.
+    """
+    return [(pos[node][0], pos[node][1], str(node_data['node_id'])) 
+            for node, node_data in G.nodes(data=True)]
 
-def base_graph(G: nx.DiGraph, ax: plt.Axes, pos: dict, label_edges: bool = True) -> plt.Axes:
+def base_graph(G: nx.DiGraph, ax: plt.Axes, pos: dict, label_edges: bool = True,
+               node_colors: list = None, node_texts: list = None, 
+               draw_edges: bool = True) -> plt.Axes:
     """
     Plot the base graph with nodes and edges.
 
@@ -76,30 +128,43 @@ def base_graph(G: nx.DiGraph, ax: plt.Axes, pos: dict, label_edges: bool = True)
         A dictionary containing node positions.
     label_edges : bool, optional
         Whether to label edges, by default True.
+    node_colors : list, optional
+        Precomputed output of get_node_colors, computed if not given.
+    node_texts : list, optional
+        Precomputed output of get_node_texts, computed if not given.
+    draw_edges : bool, optional
+        Whether to draw the edges of the graph, by default True.
 
     Returns
     -------
     plt.Axes
         The modified axes object.
     """
-    # Draw nodes with different colors based on node types
-    node_colors = []
-    for node_data in G.nodes(data=True):
-        node = node_data[0]
-
-        # Set color of nodes based on their type
-        if 'node_type' in node_data[1] and node_data[1]['node_type'] == 'Pickup Node':
-            node_colors.append('green')
-        elif 'node_type' in node_data[1] and node_data[1]['node_type'] == 'Delivery Node':
-            node_colors.append('blue')
-        elif 'node_type' in node_data[1] and node_data[1]['node_type'] == 'Depot Node':
-            node_colors.append('red')
-        else:
-            node_colors.append('gray')  # Default color
-        ax.text(pos[node][0], pos[node][1], str(node_data[1]['node_id']), fontsize=8, ha='center', va='center', color="white")
+    # Colors and ID labels only depend on the graph, so callers drawing 
+    # many frames can compute them once and pass them in
+    if node_colors is None:
+        node_colors = get_node_colors(G)
+    if node_texts is None:
+        node_texts = get_node_texts(G, pos)
+
+    # Every ID label is a separate text artist, they are skipped on 
+    # large graphs where the labels would overlap anyway
+    if len(node_texts) <= MAX_NODE_LABELS:
+        for x, y, text in node_texts:
+            ax.text(x, y, text, fontsize=8, ha='center', va='center', color="white")
         
-    nx.draw_networkx_nodes(G, pos, ax=ax, node_size=100, node_color=node_colors)
-    nx.draw_networkx_edges(G, pos, ax=ax, edge_color='black', width=0.5, arrows=False)
+    # Draw all nodes as a single scatter collection from contiguous coordinate arrays
+    xy = G.graph['pos_arr']
+    ax.scatter(xy[:, 0], xy[:, 1], s=100, c=node_colors, zorder=2)
+    ax.tick_params(axis="both", which="both", bottom=False, left=False, 
+                   labelbottom=False, labelleft=False)
+
+    # Draw all edges as one LineCollection gathered from the position array
+    if draw_edges:
+        edges = np.array(G.edges(), dtype=np.int64).reshape(-1, 2)
+        # Rasterized so vector outputs don't store every edge as a separate path
+        ax.add_collection(LineCollection(xy[edges], colors='black', linewidths=0.5, 
+                                         zorder=1, rasterized=True))
 
     # If True, display name of a node next to it
     if label_edges:
@@ -112,34 +177,100 @@ def base_graph(G: nx.DiGraph, ax: plt.Axes, pos: dict, label_edges: bool = True)
             plt.text(*label_pos, label, ha='center', va='center', fontsize=6, 
                     bbox=dict(boxstyle="round", facecolor='lightblue', alpha=0.3, edgecolor="none"))
         
-        edge_labels = nx.get_edge_attributes(G, 'weight')
-        nx.draw_networkx_edge_labels(G, pos, ax=ax, edge_labels=edge_labels, font_size=7)
+        # Edge labels are placed at the midpoints of the edges, computed in one 
+        # vectorized pass. They are skipped on large graphs where each label 
+        # is an expensive artist and the plot becomes unreadable anyway
+        edge_labels = G.graph.get('edge_labels', {})
+        if 0 < len(edge_labels) <= MAX_EDGE_LABELS:
+            midpoints = xy[np.array(list(edge_labels), dtype=np.int64)].mean(axis=1)
+            label_bbox = dict(boxstyle="round", facecolor='white', edgecolor='white')
+            for (x, y), label in zip(midpoints, edge_labels.values()):
+                ax.text(x, y, str(label), ha='center', va='center', fontsize=7, 
+                        bbox=label_bbox, zorder=1)
     
-    # Draw grid lines and grid numbers
-    x_values = [pos[node][0] for node in G.nodes()]
-    y_values = [pos[node][1] for node in G.nodes()]
-    center_x = (min(x_values) + max(x_values)) / 2
-    center_y = (min(y_values) + max(y_values)) / 2
+    # Draw grid lines and grid numbers, extents are taken from the position array
+    (x_min, y_min), (x_max, y_max) = xy.min(axis=0), xy.max(axis=0)
+    center_x = (x_min + x_max) / 2
+    center_y = (y_min + y_max) / 2
 
     ax.grid(True, linestyle='-', linewidth=0.3, color='gray', zorder=0)
     # Set the x and y ticks with increments of 1
-    x_ticks = range(int(min(x_values)), int(max(x_values)) + 1)
-    y_ticks = range(int(min(y_values)), int(max(y_values)) + 1)
+    x_ticks = range(int(x_min), int(x_max) + 1)
+    y_ticks = range(int(y_min), int(y_max) + 1)
     ax.set_xticks(x_ticks)
     ax.set_yticks(y_ticks)
     ax.axhline(y=center_y,linewidth=1)
     ax.axvline(x=center_x,linewidth=1)
     
     # Create legend
-    legend_handles = [mpatches.Patch(color='green', label='pickup Node'),
-                      mpatches.Patch(color='blue', label='Delivery Node'),
-                      mpatches.Patch(color='red', label='Depot Node'),
-                      mpatches.Patch(color='gray', label='Junction Node')]
+    legend_handles = [mpatches.Patch(color=color, label=node_type) 
+                      for node_type, color in NODE_COLORS.items()]
+    legend_handles.append(mpatches.Patch(color='gray', label=JUNCTION_NODE))
     prop = {'size': 7}  # Adjust font size as needed
     ax.legend(handles=legend_handles, prop=prop)
     
     return ax
 
+def path_to_segments(path: list, pos_arr: np.ndarray) -> np.ndarray:
+    """
+    Get the line segments between consecutive nodes of a path.
+
+    Parameters
+    ----------
+    path : list
+        The IDs of the nodes along the path.
+    pos_arr : np.ndarray
+        The node positions, where row i is the position of node i.
+
+    Returns
+    -------
+    np.ndarray
+        An array of shape (len(path) - 1, 2, 2) with the start and end 
+        position of every segment.
+    """
+    points = pos_arr[np.asarray(path)]
+    return np.stack((points[:-1], points[1:]), axis=1)
+
+def draw_arcs(ax: plt.Axes, segments: np.ndarray, color: str = 'red', 
+              width: float = 1) -> list:
+    """
+    Draw directed arcs as one line collection, with one arrow collection 
+    at the midpoints of the arcs showing their direction.
+
+    Parameters
+    ----------
+    ax : plt.Axes
+        The matplotlib axes object.
+    segments : np.ndarray
+        An array of shape (number of arcs, 2, 2) with the start and end 
+        position of every arc.
+    color : str, optional
+        The color of the arcs, by default 'red'.
+    width : float, optional
+        The line width of the arcs, by default 1.
+
+    Returns
+    -------
+    list
+        The artists added to the axes.
+    """
+    # Drawn above the base graph edges and below the nodes
+    lines = ax.add_collection(LineCollection(segments, colors=color, linewidths=width, zorder=1.5))
+
+    # Arrows of a fixed screen length, centered on each arc and pointing along it. 
+    # Arcs between two requests at the same node have no direction and get no arrow
+    directions = segments[:, 1] - segments[:, 0]
+    lengths = np.hypot(directions[:, 0], directions[:, 1])
+    moving = lengths > 0
+    midpoints = segments[moving].mean(axis=1)
+    directions = directions[moving] / lengths[moving, None]
+    arrows = ax.quiver(midpoints[:, 0], midpoints[:, 1], directions[:, 0], directions[:, 1], 
+                       color=color, angles='xy', pivot='mid', scale_units='inches', scale=6, 
+                       width=0.002 * width, headwidth=6, headlength=6, headaxislength=5, 
+                       zorder=1.5)
+
+    return [lines, arrows]
+
 def plot_base_graph(graph: nx.DiGraph, pos: dict) -> None:
     """
     Plot the base graph with nodes and edges.
@@ -168,29 +299,25 @@ def plot_overall_solution(graph: nx.DiGraph, pos: dict, solution_dir: str) -> No
     solution_dir : str
         The directory containing solution files.
     """
-    with open(solution_dir + "chosen_x_ijk.json", "r") as json_file:
-        chosen_x_ijk = json.load(json_file)
+    chosen_x_ijk = load_json(solution_dir, "chosen_x_ijk")
 
-    graph.remove_edges_from(list(graph.edges()))
+    # Node colors and ID labels are the same in every figure
+    node_colors = get_node_colors(graph)
+    node_texts = get_node_texts(graph, pos)
+    pos_arr = graph.graph['pos_arr']
 
     # Create a separate figure for each bus
-    bus_cnt = 0
     for bus, arc in chosen_x_ijk.items():
         fig, ax = plt.subplots(figsize=(8, 6))
         fig.suptitle('Bus ' + str(bus), fontsize=20)
         ax.clear()
-        graph.add_edges_from(arc)
-        ax = base_graph(graph, ax, pos, False)
-
-        nx.draw_networkx_edges(graph, pos, ax=ax,
-                               edge_color='red', width=1, arrows=True)
-        graph.remove_edges_from(arc)
-        bus_cnt += 1
+        # Only the chosen arcs are drawn, the graph itself is left untouched
+        ax = base_graph(graph, ax, pos, False, node_colors, node_texts, draw_edges=False)
+        segments = pos_arr[np.array(arc, dtype=np.int64).reshape(-1, 2)]
+        draw_arcs(ax, segments, color='red', width=1)
 
     plt.show()
 
-space_pressed = False
-
 def on_key_press(event) -> None:
     """
     Handle key press events.
@@ -200,21 +327,22 @@ def on_key_press(event) -> None:
     event : keyboard event
         The keyboard event.
     """
-    global space_pressed
-
-    # Each step of plotting is activated by pressing space bar
-    # The program exits when q is pressed
+    # Each step of plotting is activated by pressing space bar, which ends 
+    # the event loop the viewer is blocked in. The program exits when q is pressed
     if event.key == ' ':
-        space_pressed = True
+        event.canvas.stop_event_loop()
     elif event.key == 'q':
         sys.exit()
 
-def add_info_to_plot(total_cost: float, info: dict, x_lim: tuple, y_lim: tuple) -> float:
+def add_info_to_plot(ax: plt.Axes, total_cost: float, info: dict, 
+                     x_lim: tuple, y_lim: tuple) -> Tuple[float, list]:
     """
     Add information text to the plot.
 
     Parameters
     ----------
+    ax : plt.Axes
+        The matplotlib axes object.
     total_cost : float
         The total cost.
     info : dict
@@ -226,35 +354,32 @@ def add_info_to_plot(total_cost: float, info: dict, x_lim: tuple, y_lim: tuple)
 
     Returns
     -------
-    float
-        The updated total cost.
+    tuple
+        The updated total cost and the list of text artists added to the plot.
     """
     text = info['status']
     x_center = (x_lim[0] + x_lim[1]) / 2
 
-    plt.text(x_center, y_lim[1] + 1, text, ha='center', va='center', 
-                fontsize=10, color='white',
-        bbox=dict(boxstyle="round", facecolor='black', edgecolor="none"))
+    status_artist = ax.text(x_center, y_lim[1] + 1, text, ha='center', va='center', 
+                fontsize=10, color='white', bbox=STATUS_BBOX)
 
     load_text = f"Load : {info['l1']} -> {info['l2']}"
-    plt.text(x_lim[0] + 0.1, y_lim[1] * 1.15, load_text, ha='left', 
-                va='center', fontsize=8, color='white',
-        bbox=dict(boxstyle="round", facecolor='purple', edgecolor="none"))
+    load_artist = ax.text(x_lim[0] + 0.1, y_lim[1] * 1.15, load_text, ha='left', 
+                va='center', fontsize=8, color='white', bbox=LOAD_BBOX)
     
     time_text = f"Time : {info['t1']} -> {info['t2']}"
-    plt.text(x_lim[0] + 0.1, y_lim[1] * 1.075, time_text, ha='left', 
-                va='center', fontsize=8, color='white',
-        bbox=dict(boxstyle="round", facecolor='blue', edgecolor="none"))
+    time_artist = ax.text(x_lim[0] + 0.1, y_lim[1] * 1.075, time_text, ha='left', 
+                va='center', fontsize=8, color='white', bbox=TIME_BBOX)
     
     total_cost += int(info['path_cost'])
     cost_text = f"Cost : {info['path_cost']:.2f} - total Cost : {total_cost:.2f}"
-    plt.text(x_lim[0] + 0.1, y_lim[1], cost_text, ha='left', 
-                va='center', fontsize=8, color='white',
-                bbox=dict(boxstyle="round", facecolor='brown', edgecolor="none"))
+    cost_artist = ax.text(x_lim[0] + 0.1, y_lim[1], cost_text, ha='left', 
+                va='center', fontsize=8, color='white', bbox=COST_BBOX)
     
-    return total_cost
+    return total_cost, [status_artist, load_artist, time_artist, cost_artist]
 
-def plot_step_by_step(graph: nx.DiGraph, pos: dict, solution_dir: str, Gif: bool = False) -> None:
+def plot_step_by_step(graph: nx.DiGraph, pos: dict, solution_dir: str, Gif: bool = False,
+                      dpi: int = 100) -> None:
     """
     Plot the solution step by step or create Gif.
 
@@ -268,12 +393,12 @@ def plot_step_by_step(graph: nx.DiGraph, pos: dict, solution_dir: str, Gif: bool
         The directory containing solution files.
     Gif : bool, optional
         Whether to create a GIF, by default False.
+    dpi : int, optional
+        The resolution of the GIF frames, by default 100. Higher values 
+        make every frame considerably slower to render.
     """
-    global space_pressed
-
     # Read the JSON file
-    with open(solution_dir + "trips.json", "r") as json_file:
-        trips = json.load(json_file)
+    trips = load_json(solution_dir, "trips")
 
     gif_dir = solution_dir + "Gifs/"
 
@@ -281,64 +406,72 @@ def plot_step_by_step(graph: nx.DiGraph, pos: dict, solution_dir: str, Gif: bool
     if not os.path.exists(gif_dir) and Gif:
         os.makedirs(gif_dir)
 
-    # Create a separate figure for each bus
-    bus_cnt = 0
+    # Frames are kept in memory and written as one Gif per bus
+    writer = PillowWriter(fps=1) if Gif else None
+
+    # The base graph is static, so it is drawn once and only the 
+    # artists of each step are added and removed afterwards
+    fig, ax = plt.subplots(figsize=(8, 6))
+    fig.canvas.mpl_connect('key_press_event', on_key_press)
+    ax = base_graph(graph, ax, pos, False)
+    pos_arr = graph.graph['pos_arr']
+    y_lim = ax.get_ylim()
+    x_lim = ax.get_xlim()
+    ax.set_ylim(y_lim[0], y_lim[1] * 1.2)
+
+    if not Gif:
+        plt.show(block=False)
+
     for bus, trip in trips.items():
         movements = trip['movements_sorted']
         total_cost = 0
-        fig, ax = plt.subplots(figsize=(8, 6))
         fig.suptitle('Bus ' + str(bus) , fontsize=20)
-        fig.canvas.mpl_connect('key_press_event', on_key_press)
-        ax = base_graph(graph, ax, pos, False)
-
-        # If bus stops in a node, skip it
-        valid_movements = []
-        for info in movements:
-            if len(info['path']) > 1:
-                valid_movements.append(info)
-
-        for idx, info in enumerate(valid_movements):
-            paths = info['path']
-            ax.clear()
-            ax = base_graph(graph, ax, pos, False)
-            y_lim = plt.ylim()
-            x_lim = plt.xlim()
-            plt.ylim(y_lim[0], y_lim[1] * 1.2)
 
-            if Gif:
-                total_cost = add_info_to_plot(total_cost, info, x_lim, y_lim)
+        if Gif:
+            writer.setup(fig, f'{gif_dir}bus_{bus}.gif', dpi=dpi)
+        else:
+            # Render the static figure once per bus, every step 
+            # is then blitted on top of this background
+            fig.canvas.draw()
+            background = fig.canvas.copy_from_bbox(fig.bbox)
 
-                edges = list(zip(paths, paths[1:]))
-                nx.draw_networkx_edges(graph, pos, edgelist=edges, ax=ax, edge_color='r', 
-                                       width=2, arrows=True)
-                
-                # Create a still image for every step the bus takes
-                frame_filename = gif_dir + f'Bus_{bus}_frame_{idx}.png'
-                fig.savefig(frame_filename)
+        # If bus stops in a node, skip it. The segments of each 
+        # step are gathered once here, outside the frame loop
+        valid_movements = [(info, path_to_segments(info['path'], pos_arr)) 
+                           for info in movements if len(info['path']) > 1]
+
+        for info, segments in valid_movements:
+            total_cost, step_artists = add_info_to_plot(ax, total_cost, info, x_lim, y_lim)
+
+            # The path is drawn as two collections instead of an arrow patch per edge
+            step_artists += draw_arcs(ax, segments, color='red', width=2)
+
+            if Gif:
+                # Grab the rendered RGBA buffer as a frame, 
+                # without encoding and reading back an image file
+                writer.grab_frame()
                 
             else:
-                total_cost = add_info_to_plot(total_cost, info, x_lim, y_lim)
+                # Only redraw the artists of this step over the cached background
+                fig.canvas.restore_region(background)
+                for artist in step_artists:
+                    artist.set_animated(True)
+                    ax.draw_artist(artist)
+                fig.canvas.blit(fig.bbox)
 
-                edges = list(zip(paths, paths[1:]))
-                nx.draw_networkx_edges(graph, pos, edgelist=edges, ax=ax, edge_color='r', 
-                                        width=2, arrows=True)
+                # Block in the GUI event loop until space bar is pressed. Unlike 
+                # plt.pause, the event loop doesn't trigger a full redraw that 
+                # would discard the blit, and it doesn't poll while waiting
+                fig.canvas.start_event_loop(0)
 
-                # Pause while space bar is not pressed
-                while not space_pressed:
-                    plt.pause(0.1)
-                space_pressed = False
+            for artist in step_artists:
+                artist.remove()
 
-        if Gif:
-            # Concatenate all images to create a gif for each bus
-            frames = [Image.open(f'{gif_dir}/{frame}') for frame in sorted(os.listdir(gif_dir)) 
-                      if frame.endswith(".png")]
-            gif_filename = f'{gif_dir}/bus_{bus}.gif'
-            frames[0].save(gif_filename, format='GIF', append_images=frames[1:], 
-                        save_all=True, duration=1000, loop=0)
-            [f.unlink() for f in Path(gif_dir).glob("*") if f.name.endswith(".png")] 
-        
-        bus_cnt += 1
-        plt.close(fig)
+        if Gif and valid_movements:
+            # Concatenate all frames to create a gif for each bus
+            writer.finish()
+
+    plt.close(fig)
 
     if not Gif:
         plt.show()
@@ -355,7 +488,7 @@ def main():
     operation = input()
     
     graph, _, _ = get_full_graph(base_directory)
-    pos = {node_data[0]: (node_data[1]['x'], node_data[1]['y']) for node_data in graph.nodes(data=True)}
+    pos = graph.graph['pos']
 
     if operation == "1":
         plot_base_graph(graph, pos)
@@ -364,6 +497,8 @@ def main():
     elif operation == "3":
         plot_step_by_step(graph, pos, solution_dir, Gif=False)
     elif operation == "4":
+        # Gifs are rendered off-screen, so no GUI window or event loop is needed
+        plt.switch_backend('Agg')
         plot_step_by_step(graph, pos, solution_dir, Gif=True)
 
 if __name__ == "__main__":
@@ -11,15 +11,21 @@ Functions included:
 - get_dirs: Prompt the user for problem directory and return directory paths.
 - load_json: Load a JSON file from a specified directory.
 - save_json: Save a dictionary to a JSON file in a specified directory.
-- shortest_path_and_lengths_tt_and_distance: Compute shortest paths and lengths based on travel time and distance.
+- get_shortest_paths: Compute all pairs shortest path predecessors and lengths based on one edge attribute.
+- get_path: Rebuild a single shortest path from the predecessor matrix.
+- shortest_path_and_lengths_tt_and_distance: Compute shortest paths and lengths based on travel time and lengths based on distance.
 - get_request_id: Determine the request ID and type based on destination ID.
 - get_status: Generate a status message based on request ID, type, and destination.
 - get_bus_movement: Create a dictionary representing a bus movement.
 
 Dependencies:
 - json: For reading and writing JSON files.
+- functools: For memoizing repeated status lookups.
+- orjson (optional): For faster reading and writing of JSON files.
 - pathlib.Path: For directory path manipulations.
 - networkx: For graph operations.
+- numpy: For shortest path length matrices.
+- scipy: For computing shortest paths on a sparse matrix.
 - os: For getting directories.
 """
 __author__ = "Danial Chekani"
@@ -28,12 +34,24 @@ __status__ = "Dev"
 
 import json
 import os
+from functools import lru_cache
 from pathlib import Path
-from typing import Tuple
+from typing import List, Optional, Tuple, Union
 import networkx as nx
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import shortest_path
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from Models import Movement, Trip
 
+# Directories already created by save_json, so each one is only created once
+created_dirs = set()
+
 def get_dirs() -> Tuple[str, str]:
     """
     Prompt the user to input the folder name of the problem and return the base 
@@ -63,12 +81,35 @@ class Obj_encoder(json.JSONEncoder):
     """
     def default(self, obj):
         if isinstance(obj, (Movement, Trip)):
-            return obj.__dict__
+            return obj.to_dict()
         return super().default(obj)
 
+def load_json(dir: str, file_name: str) -> dict:
+    """
+    Load a JSON file from the specified directory. orjson is used 
+    when it is installed, otherwise the standard json module.
+
+    Parameters
+    ----------
+    dir : str
+        The directory containing the JSON file.
+    file_name : str
+        The name of the JSON file to load (without the .json extension).
+
+    Returns
+    -------
+    dict
+        The content of the JSON file.
+    """
+    with open(dir + f"{file_name}.json", "rb") as json_file:
+        if orjson is not None:
+            return orjson.loads(json_file.read())
+        return json.load(json_file)
+
 def save_json(dir: str, file_name: str, file: dict) -> None:
     """
-    Save a dictionary to a JSON file in the specified directory.
+    Save a dictionary to a JSON file in the specified directory. orjson is 
+    used when it is installed, otherwise the standard json module.
 
     Parameters
     ----------
@@ -79,60 +120,143 @@ def save_json(dir: str, file_name: str, file: dict) -> None:
     file : dict
         The dictionary to save as a JSON file.
     """
-    Path(dir).mkdir(parents=True, exist_ok=True)
-    with open(dir + f"{file_name}.json", "w") as json_file:
-        json.dump(file, json_file, indent=4, cls=Obj_encoder)
+    if dir not in created_dirs:
+        Path(dir).mkdir(parents=True, exist_ok=True)
+        created_dirs.add(dir)
+    if orjson is not None:
+        # orjson only supports two space indentation
+        with open(dir + f"{file_name}.json", "wb") as json_file:
+            json_file.write(orjson.dumps(file, default=Obj_encoder().default, 
+                                         option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | 
+                                         orjson.OPT_SERIALIZE_NUMPY))
+    else:
+        with open(dir + f"{file_name}.json", "w") as json_file:
+            json.dump(file, json_file, indent=4, cls=Obj_encoder)
 
-def shortest_path_and_lengths_tt_and_distance(graph: nx.DiGraph) -> tuple:
+def get_shortest_paths(graph: nx.DiGraph, weight: str, return_predecessors: bool = True, 
+                       sources: Optional[List[int]] = None) -> Union[Tuple[np.ndarray, np.ndarray], np.ndarray]:
     """
-    Calculate the shortest paths and their lengths based on travel time and distance 
-    for a given graph.
+    Calculate the shortest path predecessors and lengths between all pairs 
+    of nodes of a graph, based on a single edge attribute. The paths 
+    themselves are rebuilt with get_path only where they are needed.
+
+    Parameters
+    ----------
+    graph : networkx.DiGraph
+        A directed graph whose nodes are numbered from 0.
+    weight : str
+        The edge attribute used as the length of each edge.
+    return_predecessors : bool, optional
+        Whether the predecessor matrix is returned, by default True. 
+        Skip it when only the lengths are needed.
+    sources : list, optional
+        The nodes to compute shortest paths from, by default all nodes. 
+        Only these rows are computed and returned, in the order of sources.
+
+    Returns
+    -------
+    tuple or np.ndarray
+        A tuple containing the predecessor matrix and the shortest path lengths 
+        as a matrix, both of shape (number of sources, number of nodes) and indexed 
+        by [row of source, target]. Only the lengths if return_predecessors is False. 
+        Lengths of unreachable pairs are infinite.
+    """
+    n_nodes = graph.number_of_nodes()
+    edges = list(graph.edges.data(weight))
+    tails = [u for u, _, _ in edges]
+    heads = [v for _, v, _ in edges]
+    weights = [w for _, _, w in edges]
+    matrix = csr_matrix((weights, (tails, heads)), shape=(n_nodes, n_nodes))
+
+    # scipy picks the algorithm based on the graph and the sources, Floyd-Warshall 
+    # for small dense graphs and Dijkstra for sparse ones, in a single call
+    result = shortest_path(matrix, method='auto', directed=True, 
+                           return_predecessors=return_predecessors, indices=sources)
+
+    if not return_predecessors:
+        return result
+
+    lengths, predecessors = result
+
+    return predecessors, lengths
+
+def get_path(predecessors: np.ndarray, source: int, target: int, 
+             row: Optional[int] = None) -> list:
+    """
+    Rebuild the shortest path between two nodes by walking back 
+    through the predecessor matrix.
+
+    Parameters
+    ----------
+    predecessors : np.ndarray
+        The predecessor matrix returned by get_shortest_paths.
+    source : int
+        The first node of the path.
+    target : int
+        The last node of the path.
+    row : int, optional
+        The row of source in the predecessor matrix, by default source itself, 
+        as when the shortest paths are computed from all nodes.
+
+    Returns
+    -------
+    list
+        The nodes of the path from source to target, 
+        or an empty list if target is unreachable.
+    """
+    predecessor = predecessors[source if row is None else row]
+    path = [target]
+    node = target
+    while node != source:
+        node = predecessor[node]
+        if node < 0:
+            return []
+        path.append(int(node))
+    path.reverse()
+
+    return path
+
+def shortest_path_and_lengths_tt_and_distance(graph: nx.DiGraph, 
+                                              sources: Optional[List[int]] = None) -> tuple:
+    """
+    Calculate the shortest paths and their lengths based on travel time and 
+    the shortest path lengths based on distance for a given graph.
 
     Parameters
     ----------
     graph : networkx.DiGraph
         A directed graph where edges have 'travel_time' and 'distance' attributes.
+    sources : list, optional
+        The nodes to compute shortest paths from, by default all nodes. 
+        The lengths are then only kept between the sources themselves.
 
     Returns
     -------
     tuple
-        A tuple containing four dictionaries:
-        - shortest_paths_tt: Shortest paths by travel time.
-        - t: Shortest path lengths by travel time.
-        - shortest_paths_dist: Shortest paths by distance.
-        - d: Shortest path lengths by distance.
-    """
-    shortest_paths_tt = {}
-    shortest_paths_dist = {}
-    t = {}
-    d = {}
-
-    # Use Dijkstra to get shortest paths by travel time
-    all_shortest_paths_tt = dict(nx.all_pairs_dijkstra_path(graph, weight='travel_time'))
-    all_shortest_path_lengths_tt = dict(nx.all_pairs_dijkstra_path_length(graph, weight='travel_time'))
-
-    # Use Dijkstra to get shortest paths by distance
-    all_shortest_paths_dist = dict(nx.all_pairs_dijkstra_path(graph, weight='distance'))
-    all_shortest_path_lengths_dist = dict(nx.all_pairs_dijkstra_path_length(graph, weight='distance'))
-
-    # Calculate the shortest path and shortest path lengths for travel time and distance
-    for source_node, paths in all_shortest_paths_tt.items():
-        shortest_paths_tt[source_node] = {}
-        t[source_node] = {}
-        shortest_paths_dist[source_node] = {}
-        d[source_node] = {}
-
-        for target_node, path in paths.items():
-            shortest_paths_tt[source_node][target_node] = path
-            t[source_node][target_node] = all_shortest_path_lengths_tt[source_node][target_node]
-            shortest_paths_dist[source_node][target_node] = all_shortest_paths_dist[source_node][target_node]
-            d[source_node][target_node] = all_shortest_path_lengths_dist[source_node][target_node]
-
-    return shortest_paths_tt, t, shortest_paths_dist, d
+        A tuple containing:
+        - predecessors_tt: Shortest path predecessors by travel time, as a matrix 
+          indexed by [row of source, target].
+        - t: Shortest path lengths by travel time, as a matrix indexed by 
+          [row of source, row of target].
+        - d: Shortest path lengths by distance, as a matrix indexed by 
+          [row of source, row of target].
+        Lengths of unreachable pairs are infinite. Paths are rebuilt with get_path.
+    """
+    predecessors_tt, t = get_shortest_paths(graph, 'travel_time', sources=sources)
+    d = get_shortest_paths(graph, 'distance', return_predecessors=False, sources=sources)
+
+    # Only the lengths between sources are used, so the other columns are dropped
+    if sources is not None:
+        t = t[:, sources]
+        d = d[:, sources]
+
+    return predecessors_tt, t, d
 
+@lru_cache(maxsize=None)
 def get_request_id(destination_id: int, n: int) -> tuple:
     """
     Determine the request ID and type based on the destination ID.
+    Results are memoized, as the same nodes are reached by several buses.
 
     Parameters
     ----------
@@ -154,9 +278,11 @@ def get_request_id(destination_id: int, n: int) -> tuple:
     else: 
         return -1, "Depot"
 
+@lru_cache(maxsize=None)
 def get_status(request_id: int, type: str, destination: int) -> str:
     """
     Generate a status message based on the request ID, type, and destination.
+    Results are memoized, as the same messages repeat across buses.
 
     Parameters
     ----------
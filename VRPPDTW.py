@@ -20,13 +20,17 @@ Functions included:
 - get_time: Get current time
 - get_path_cost: Get the cost of a single path
 - get_cost_matrix: Get path costs for all paths
+- get_greedy_routes: Get initial routes for warm starting the solver
+- get_incompatible_pairs: Get pairs of requests that can not share a bus
 - optimize_model: Solve the VRPPDTW problem
 
 Dependencies:
 - docplex.mp.model: For solving the model using DoCplex.
 - networkx: For graph operations.
+- numpy: For the travel time, distance and cost matrices.
 - time: For tracking running time of the program
 - datetime: For displaying time in correct format
+- itertools: For generating the arcs between node pairs and request pairs
 """
 __author__ = "Danial Chekani"
 __email__ = "danialchekani@arizona.edu"
@@ -34,12 +38,16 @@ __status__ = "Dev"
 
 import time
 from datetime import datetime
+from itertools import combinations, permutations
 from typing import Dict, List, Tuple
 from networkx import DiGraph
+import numpy as np
 from Parsing import get_full_graph
+from docplex.mp.constants import EffortLevel
 from docplex.mp.model import Model
+from docplex.mp.solution import SolveSolution
 
-from Utils import get_dirs, get_request_id, get_status, save_json, shortest_path_and_lengths_tt_and_distance
+from Utils import get_dirs, get_path, get_request_id, get_status, save_json, shortest_path_and_lengths_tt_and_distance
 from Models import Movement, Request, Trip, Vehicle
 
 def get_time() -> str:
@@ -107,11 +115,11 @@ def get_cost_matrix(vehicles : Dict[int, Vehicle], travel_time_matrix : list,
         A dictionary where the keys are vehicle IDs and the values are each 
         vehicle's information in the following format:
         (Origin_depot_ID, Destination_depot_ID, Capacity, Bus_type)
-    travel_time_matrix : list
-        A 2D list (matrix) where each element represents the travel time in minutes 
+    travel_time_matrix : array_like
+        A 2D matrix where each element represents the travel time in minutes 
         between two points.
-    distance_matrix : list
-        A 2D list (matrix) where each element represents the distance in kilometers 
+    distance_matrix : array_like
+        A 2D matrix where each element represents the distance in kilometers 
         between two points.
     cost_factors : list
         A dynamic list containing factors used to calculate the cost.
@@ -123,8 +131,8 @@ def get_cost_matrix(vehicles : Dict[int, Vehicle], travel_time_matrix : list,
 
     Returns
     -------
-    list
-        A 3D list (matrix) where the element at [i][j][k] represents the cost 
+    np.ndarray
+        A 3D matrix where the element at [i][j][k] represents the cost 
         of traveling from point i to point j using vehicle k.
 
     Example
@@ -143,23 +151,162 @@ def get_cost_matrix(vehicles : Dict[int, Vehicle], travel_time_matrix : list,
         ]
     >>> cost_factors = [10.0, 2.0, 100.0]
     >>> get_cost_matrix(vehicles, travel_time_matrix, distance_matrix, cost_factors)
-    [[[0.0, 0.0], [430.0, 430.0]], [[430.0, 430.0], [0.0, 0.0]]]
+    array([[[100., 100.], [430., 430.]], [[430., 430.], [100., 100.]]])
     """
 
-    cost = []
-    for i in range(len(travel_time_matrix)):
-        cost.append([])
-        for j in range(len(travel_time_matrix[i])):
-            cost[i].append([])
-            for k, vehicle in vehicles.items():
-                result = get_path_cost(travel_time_matrix[i][j], distance_matrix[i][j], 
-                                        vehicle.bus_type, vehicle.capacity, cost_factors)
-                cost[i][j].append(result)
+    travel_time_matrix = np.asarray(travel_time_matrix, dtype=np.float64)
+    distance_matrix = np.asarray(distance_matrix, dtype=np.float64)
+
+    # get_path_cost is applied to the whole matrices at once for each vehicle
+    cost = np.stack([get_path_cost(travel_time_matrix, distance_matrix, vehicle.bus_type, 
+                                   vehicle.capacity, cost_factors) 
+                     for vehicle in vehicles.values()], axis=-1)
 
     return cost
 
+def get_greedy_routes(vehicles : Dict[int, Vehicle], V_row : dict, a : np.ndarray, b : np.ndarray, 
+                      s : np.ndarray, l : np.ndarray, travel_time_matrix : np.ndarray, cost : np.ndarray):
+    """
+    Build an initial route for each bus with a greedy insertion heuristic, 
+    used as a warm start for the solver. Requests are taken in order of their 
+    earliest pickup time and each pickup and delivery pair is inserted at the 
+    cheapest positions of any route that keep all time windows and capacities.
+
+    Parameters
+    ----------
+    vehicles : dict
+        A dictionary where the keys are vehicle IDs and the values are vehicles.
+    V_row : dict
+        A dictionary where the keys are vehicle IDs and the values map each 
+        node index of the model to the row of its node in the matrices.
+    a : np.ndarray
+        The beginning of the time window of each node index.
+    b : np.ndarray
+        The end of the time window of each node index.
+    s : np.ndarray
+        The service time of each node index.
+    l : np.ndarray
+        The load change at each node index.
+    travel_time_matrix : np.ndarray
+        The shortest travel time between each pair of used nodes, indexed by their rows.
+    cost : np.ndarray
+        The cost matrix returned by get_cost_matrix.
+
+    Returns
+    -------
+    dict or None
+        A dictionary where the keys are the vehicle IDs and the values are the 
+        routes as lists of node indices, from the origin to the destination depot. 
+        None if a request could not be inserted in any route.
+    """
+
+    n = (len(a) - 2) // 2
+    origin = 2*n
+    destination = 2*n + 1
+
+    def is_feasible(route, k):
+        nodes = V_row[k]
+        arrival = 0
+        load = 0
+        for i, j in zip(route, route[1:]):
+            arrival = max(a[j], arrival + s[i] + travel_time_matrix[nodes[i], nodes[j]])
+            load += l[j]
+            if arrival > b[j] or load < 0 or load > vehicles[k].capacity:
+                return False
+        return True
+
+    def arc_cost(i, j, k):
+        nodes = V_row[k]
+        return cost[nodes[i], nodes[j], k]
+
+    routes = {k: [origin, destination] for k in vehicles}
+
+    for i in sorted(range(n), key=lambda i: a[i]):
+        best = None
+        for k, route in routes.items():
+            # The pickup is inserted before position p and the delivery before position q.
+            # The added cost only depends on the arcs removed and added by the insertion, 
+            # so the feasibility of the route is only checked for improving candidates
+            for p in range(1, len(route)):
+                before, after = route[p - 1], route[p]
+                pickup_cost = (arc_cost(before, i, k) + arc_cost(i, after, k) 
+                               - arc_cost(before, after, k))
+                for q in range(p, len(route)):
+                    if q == p:
+                        added_cost = (arc_cost(before, i, k) + arc_cost(i, n + i, k) 
+                                      + arc_cost(n + i, after, k) - arc_cost(before, after, k))
+                    else:
+                        added_cost = (pickup_cost + arc_cost(route[q - 1], n + i, k) 
+                                      + arc_cost(n + i, route[q], k) 
+                                      - arc_cost(route[q - 1], route[q], k))
+                    if best is not None and not added_cost < best[0]:
+                        continue
+                    candidate = route[:p] + [i] + route[p:q] + [n + i] + route[q:]
+                    if is_feasible(candidate, k):
+                        best = (added_cost, k, candidate)
+        if best is None:
+            return None
+        routes[best[1]] = best[2]
+
+    return routes
+
+def get_incompatible_pairs(nodes : list, a : np.ndarray, b : np.ndarray, s : np.ndarray, 
+                           l : np.ndarray, travel_time_matrix : np.ndarray, capacity : int):
+    """
+    Find the pairs of requests that can not be served by the same bus, as no order 
+    of their pickups and deliveries keeps the time windows and the capacity. 
+    Depots are left out of the check, so these pairs can not share any route.
+
+    Parameters
+    ----------
+    nodes : list
+        The row in the matrices of the node of each node index of the model.
+    a : np.ndarray
+        The beginning of the time window of each node index.
+    b : np.ndarray
+        The end of the time window of each node index.
+    s : np.ndarray
+        The service time of each node index.
+    l : np.ndarray
+        The load change at each node index.
+    travel_time_matrix : np.ndarray
+        The shortest travel time between each pair of used nodes, indexed by their rows.
+    capacity : int
+        The capacity of the bus.
+
+    Returns
+    -------
+    list
+        A list of (i, r) tuples of the requests that can not be served together.
+    """
+
+    n = (len(a) - 2) // 2
+    pairs = []
+
+    for i, r in combinations(range(n), 2):
+        for order in permutations((i, n + i, r, n + r)):
+            # Deliveries can only follow their own pickups
+            if order.index(i) > order.index(n + i) or order.index(r) > order.index(n + r):
+                continue
+            arrival = a[order[0]]
+            load = l[order[0]]
+            if load > capacity:
+                continue
+            for u, v in zip(order, order[1:]):
+                arrival = max(a[v], arrival + s[u] + travel_time_matrix[nodes[u], nodes[v]])
+                load += l[v]
+                if arrival > b[v] or load > capacity:
+                    break
+            else:
+                # This order serves both requests, so they are compatible
+                break
+        else:
+            pairs.append((i, r))
+
+    return pairs
+
 def optimize_model(vehicles : Dict[int, Vehicle], requests : Dict[int, Request], 
-                   graph : DiGraph, cost_factors : list) \
+                   graph : DiGraph, cost_factors : list, cplex_parameters : dict = None) \
                     -> Tuple[Dict[int, Trip], Dict[int, List], Dict[int, str], Dict[int, int]]:
     """"
     The main function to solve the Vehicle Routing Problem with Time Window Constraints
@@ -185,6 +332,12 @@ def optimize_model(vehicles : Dict[int, Vehicle], requests : Dict[int, Request],
         - beta (float): The cost factor per kilometer of distance.
         - const (float): A constant cost added to the total.
 
+    cplex_parameters : dict, optional
+        CPLEX parameters to tune the solver for an instance, where the keys are 
+        the dotted parameter names and the values are the parameter values, 
+        e.g. {'threads': 4, 'mip.strategy.probe': 3, 'emphasis.mip': 1}. 
+        CPLEX defaults are used for parameters that are not given.
+
     Returns
     -------
     trips : dict
@@ -200,222 +353,290 @@ def optimize_model(vehicles : Dict[int, Vehicle], requests : Dict[int, Request],
         are the loads that have changed after serving request i.
     """
 
-    M = 5e3  # A large positive constant for linearizing
-    
     print("Started Process: " + get_time())
 
     K = list(vehicles.keys())
-    N_values = []
-
-    for request_id, request in requests.items():
-        N_values.append(request.origin_id)
-    for request_id, request in requests.items():
-        N_values.append(request.destination_id)
+    N_values = [request.origin_id for request in requests.values()] + \
+               [request.destination_id for request in requests.values()]
 
     """
-    Creating auxiliary lists P, D, N
-    Since P, D, N are simply pointers to geographical nodes they 
-    are created using the range function.
+    Creating auxiliary lists P, N
+    Since P, N are simply pointers to geographical nodes they 
+    are created using the range function. Delivery nodes are the 
+    indices n to 2n - 1 and are not needed as a separate list.
 
-    Since every bus can take every possible path, k notation for P, D, N
+    Since every bus can take every possible path, k notation for P, N
     are omitted and each bus shares the same lists
     """
     n = len(requests)
     P = list(range(n))
-    D = list(range(n,2*n))
     N = list(range(2*n))
 
     # Determining origin and destination index of each bus
     origin = 2*n
     destination = 2*n + 1
 
-    s = [] # Service time of each node in N. Assumed 0 at depots
-    a = [] # List of the beginning of arrival and departure windows.
-    b = [] # List of the end of arrival and departure windows.
-    l = [] # List of the loads at each node in N.
-
-    for i in range(n):
-        l.append(requests[i].num_of_people)
-        a.append(requests[i].earliest_departure_minutes)
-        b.append(requests[i].latest_departure_minutes)
-        s.append(requests[i].departure_service_time)
-
-    for i in range(n):
-        l.append(-requests[i].num_of_people) # load of a bus changes by -d_i when delivering request i
-        a.append(requests[i].earliest_arrival_minutes)
-        b.append(requests[i].latest_arrival_minutes)
-        s.append(requests[i].arrival_service_time)
-
-    # Including values for depots
-    a.extend([0,24*60])
-    b.extend([0,24*60])
-    s.extend([0,0])
-    l.extend([0,0])
+    # Pickup nodes come first, then delivery nodes and the two depots
+    # Arrays allow the constants of all arcs to be computed at once
+    ordered_requests = [requests[i] for i in range(n)]
+
+    # Service time of each node in N. Assumed 0 at depots
+    s = np.array([request.departure_service_time for request in ordered_requests] + 
+                 [request.arrival_service_time for request in ordered_requests] + 
+                 [0, 0], dtype=np.float64)
+    # List of the beginning of arrival and departure windows.
+    a = np.array([request.earliest_departure_minutes for request in ordered_requests] + 
+                 [request.earliest_arrival_minutes for request in ordered_requests] + 
+                 [0, 24*60], dtype=np.float64)
+    # List of the end of arrival and departure windows.
+    b = np.array([request.latest_departure_minutes for request in ordered_requests] + 
+                 [request.latest_arrival_minutes for request in ordered_requests] + 
+                 [0, 24*60], dtype=np.float64)
+    # List of the loads at each node in N, 
+    # load of a bus changes by -d_i when delivering request i
+    l = np.array([request.num_of_people for request in ordered_requests] + 
+                 [-request.num_of_people for request in ordered_requests] + 
+                 [0, 0], dtype=np.float64)
 
     V = {}
     V_val = {}
     A = {}
 
-    # Creating dict of possible arcs for each bus
     for k in K:
-        arcs = []
         V_val[k] = N_values + [vehicles[k].origin_id, vehicles[k].destination_id]
-        V[k] = [i for i in range(len(V_val[k]))]
-        for i in V[k]:
-            for j in V[k]:
-                if i != j:
-                    arcs.append((i,j))
-        A[k] = arcs
+
+    # Using Dijekstra to get the shortest paths based on travel time and distance
+    # It is assumed that travel_time is the same for all buses and only
+    # Depends on i and j. Only paths leaving request and depot nodes are used
+    used_nodes = sorted(set(node for k in K for node in V_val[k]))
+    predecessors_tt, t, d = shortest_path_and_lengths_tt_and_distance(graph, used_nodes)
+
+    # The matrices only cover the used nodes, so the node of each 
+    # node index is mapped to its row in the matrices
+    row = {node: r for r, node in enumerate(used_nodes)}
+    V_row = {k: [row[node] for node in V_val[k]] for k in K}
+
+    cost = get_cost_matrix(vehicles, t, d, cost_factors)
+    
+    print("Calculated Costs: " + get_time())
+
+    # Creating dict of possible arcs for each bus
+    # Arcs entering the origin depot or leaving the destination depot can 
+    # never carry flow, so no variables or constraints are created for them
+    nodes_range = list(range(2*n + 2))
+    arcs = [(i, j) for i, j in permutations(nodes_range, 2) 
+            if i != destination and j != origin]
+    all_i = np.array([i for i, _ in arcs], dtype=np.int64)
+    all_j = np.array([j for _, j in arcs], dtype=np.int64)
+
+    # Arcs that no feasible route can use are removed as well. The endpoints of 
+    # the remaining arcs are kept as arrays, used to compute the constants of 
+    # constraint 9.7 and to read the chosen arcs for all arcs at once
+    arc_i = {}
+    arc_j = {}
+    for k in K:
+        V[k] = nodes_range
+        nodes = np.asarray(V_row[k])
+        # Reaching j after its time window closes, even when leaving i as early as possible
+        feasible = a[all_i] + s[all_i] + t[nodes[all_i], nodes[all_j]] <= b[all_j]
+        # Going from a delivery back to the pickup of the same request
+        feasible &= ~((all_j < n) & (all_i == all_j + n))
+        # Going from the origin depot, where the bus is empty, straight to a delivery
+        feasible &= (all_i != origin) | (l[all_j] >= 0)
+        # Going from a pickup straight to the destination depot, before its delivery
+        feasible &= ~((all_i < n) & (all_j == destination))
+        kept = np.flatnonzero(feasible)
+        arc_i[k] = all_i[kept]
+        arc_j[k] = all_j[kept]
+        A[k] = list(zip(arc_i[k].tolist(), arc_j[k].tolist()))
+
+    # Arcs leaving and entering each node, used by the flow constraints
+    outgoing = {k: [[] for _ in V[k]] for k in K}
+    incoming = {k: [[] for _ in V[k]] for k in K}
+    for k in K:
+        for (i, j) in A[k]:
+            outgoing[k][i].append(j)
+            incoming[k][j].append(i)
 
     model = Model("VRPPDTW")
 
     # Decision variable X stores all the possible arcs for each bus
+    # Variables of each group are created in one batched call per bus and 
+    # kept in lists indexed as X[k][i][j], T[k][i] and L[k][i]
+    # The variables and constraints of each arc are the bulk of the model and 
+    # are left unnamed, formatting their names costs more than creating them
     X = {}
-    cnt = 0
-    for k, arcs in A.items():
-        for arc in arcs:
-            i, j = arc
-            X[arc, k] = model.binary_var(name=f'X_{i}_{j}_{k}_{cnt}')
-            cnt += 1
+    for k in K:
+        X[k] = [[None] * len(V[k]) for _ in V[k]]
+        arc_vars = model.binary_var_list(len(A[k]))
+        for (i, j), var in zip(A[k], arc_vars):
+            X[k][i][j] = var
 
     # Decision variable T for storing time to serve request i by bus k
-    T = {}
-    cnt = 0
-    for k in K:
-        for i in range(len(V[k])):
-            T[i, k] = model.continuous_var(name=f't_ik_{i}_{k}_{cnt}')
-            cnt += 1
+    # The time windows of constraint 9.8 are set as the bounds of T
+    T = {k: model.continuous_var_list(V[k], lb=a.tolist(), ub=b.tolist(), 
+                                      name=lambda i, k=k: f't_ik_{i}_{k}') for k in K}
 
     # Decision variable L for storing load change after serving request i by bus k
+    # The load limits of constraints 9.11 and 9.12 and the empty bus leaving 
+    # the origin depot of constraint 9.13 are set as the bounds of L
     L = {}
-    cnt = 0
     for k in K:
-        for i in range(len(V[k])):
-            L[i, k] = model.continuous_var(name=f'lk_{i}_{k}_{cnt}')
-            cnt += 1
+        capacity = vehicles[k].capacity
+        lower_bounds = l[P].tolist() + [0] * n + [0, 0]
+        upper_bounds = [capacity] * n + (capacity - l[P]).tolist() + [0, model.infinity]
+        L[k] = model.continuous_var_list(V[k], lb=lower_bounds, ub=upper_bounds, 
+                                         name=lambda i, k=k: f'lk_{i}_{k}')
 
     print("Created variables: " + get_time())
 
-    # Using Dijekstra to get the shortest paths based on travel time and distance
-    # It is assumed that travel_time is the same for all buses and only
-    # Depends on i and j
-    shortest_paths_tt, t, _, d = shortest_path_and_lengths_tt_and_distance(graph)
-
-    cost = get_cost_matrix(vehicles, t, d, cost_factors)
-    
-    print("Calculated Costs: " + get_time())
-
     # Define the objective function
-    objective = model.sum(cost[V_val[k][i]][V_val[k][j]][k] * X[(i,j), k] 
-                          for (i,j) in A[k] for k in K)
+    # Node labels of the arcs are resolved once per vehicle, the variables 
+    # and their costs are passed to a single scalar product
+    objective_vars = []
+    objective_coefs = []
+    for k in K:
+        nodes = V_row[k]
+        objective_vars.extend(X[k][i][j] for (i,j) in A[k])
+        objective_coefs.extend(cost[nodes[i], nodes[j], k] for (i,j) in A[k])
+    objective = model.scal_prod(objective_vars, objective_coefs)
 
     model.minimize(objective)
 
+    # Constraints of each family are collected with their names
+    # and added to the model in a single batched call
+
     # Constraint 9.2
-    for i in P:
-        model.add_constraint(model.sum(X[(i,j), k]
-                                       for j in N + [destination] if i != j
-                                       for k in K) == 1,
-                                       ctname=f'const_9_2_{i}')
+    model.add_constraints([model.sum_vars([X[k][i][j]
+                                           for k in K
+                                           for j in outgoing[k][i]]) == 1 for i in P],
+                          names=[f'const_9_2_{i}' for i in P])
 
     # Constraint 9.3
+    constraints, names = [], []
     for k in K:
         for i in P:
-            model.add_constraint(model.sum(X[(i, j), k] for j in N if j != i) -
-                                model.sum(X[(j, n+i), k] for j in N if j != n+i) == 0,
-                                ctname=f'const_9_3_{k}_{i}')
+            constraints.append(model.sum_vars([X[k][i][j] for j in outgoing[k][i] 
+                                               if j != destination]) -
+                               model.sum_vars([X[k][j][n+i] for j in incoming[k][n+i] 
+                                               if j != origin]) == 0)
+            names.append(f'const_9_3_{k}_{i}')
+    model.add_constraints(constraints, names=names)
 
     # Constraint 9.4
-    for k in K:
-        model.add_constraint(model.sum(X[(origin,j), k]
-                                    for j in P + [destination]) == 1,
-                                    ctname=f'const_9_4_{k}')
+    model.add_constraints([model.sum_vars([X[k][origin][j]
+                                           for j in outgoing[k][origin]
+                                           if j < n or j == destination]) == 1 for k in K],
+                          names=[f'const_9_4_{k}' for k in K])
 
     # Constraint 9.5
+    constraints, names = [], []
     for k in K:
         for j in N:
-            model.add_constraint(sum(X[(i, j), k] for i in N + [origin] if i != j)
-                                  - sum(X[(j, i), k] for i in N + [destination] if i != j) 
-                                  == 0, ctname=f"const_9_5_{k}_{j}")
+            constraints.append(model.sum_vars([X[k][i][j] for i in incoming[k][j]])
+                               - model.sum_vars([X[k][j][i] for i in outgoing[k][j]]) 
+                               == 0)
+            names.append(f"const_9_5_{k}_{j}")
+    model.add_constraints(constraints, names=names)
 
     # Constraint 9.6
-    for k in K:
-        model.add_constraint(model.sum(X[(i,destination), k]
-                                       for i in D + [origin]) == 1,
-                                       ctname=f'const_9_6_{k}')
+    model.add_constraints([model.sum_vars([X[k][i][destination]
+                                           for i in incoming[k][destination]
+                                           if i >= n]) == 1 for k in K],
+                          names=[f'const_9_6_{k}' for k in K])
 
     # Constraint 9.7
     # Linearized to make it convex
-    # T_ik + s_i + t_i,n+i,k - T_jk <= (1 - X_ijk) * M
+    # T_ik + s_i + t_i,n+i,k - T_jk <= (1 - X_ijk) * M_ij
+    # M_ij is the largest value the left side can take within the time windows
+    # Most of these rows are slack, so they are added as lazy constraints that 
+    # the solver only checks against candidate solutions and adds when violated
+    constraints = []
     for k in K:
-        for (i, j) in A[k]:
-            model.add_constraint(
-                T[i, k] + s[i] + t[V_val[k][i]][V_val[k][j]] - T[j, k] 
-                <= (1 - X[(i, j), k]) * M,
-                ctname=f'const_9_7a_{k}_{i}_{j}'
-            )
+        nodes = np.asarray(V_row[k])
+        t_arcs = t[nodes[arc_i[k]], nodes[arc_j[k]]]
+        M_arcs = np.maximum(0, b[arc_i[k]] + s[arc_i[k]] + t_arcs - a[arc_j[k]])
+        for (i, j), t_ij, M_ij in zip(A[k], t_arcs.tolist(), M_arcs.tolist()):
+            constraints.append(T[k][i] + s[i] + t_ij - T[k][j] 
+                               <= (1 - X[k][i][j]) * M_ij)
+    model.add_lazy_constraints(constraints)
 
-    # Constraint 9.8
-    for k in K:
-        for i in V[k]:
-            model.add_constraint(T[i, k] >= a[i], ctname=f'const_9_8_lower_{k}_{i}')
-            model.add_constraint(T[i, k] <= b[i], ctname=f'const_9_8_upper_{k}_{i}')
+    # Constraint 9.8 holds through the bounds of T
 
     # Constraint 9.9
+    constraints, names = [], []
     for k in K:
+        nodes = V_row[k]
         for i in P:
-            model.add_constraint(T[i, k] + t[V_val[k][i]][V_val[k][n+i]] <= 
-                                 T[n+i, k], ctname=f'const_9_9_{k}_{i}')
+            constraints.append(T[k][i] + t[nodes[i], nodes[n+i]] <= T[k][n+i])
+            names.append(f'const_9_9_{k}_{i}')
+    model.add_constraints(constraints, names=names)
 
     # Constraint 9.10
-    # Linearized to make it convex
-    # x_ijk = 0 + alpha
-    # L_ik + l_i + l_jk <= M * beta
-    # L_ik + l_i + l_jk >= -M * beta
-    # alpha + beta <= 1
+    # The load only has to propagate along arcs that are chosen, 
+    # which is added as an indicator constraint instead of a big-M pair
+    # X_ijk = 1 => L_ik + l_j - L_jk = 0
+    binaries, constraints = [], []
     for k in K:
         for (i, j) in A[k]:
-            alpha = model.binary_var(name=f'alpha_{k}_{i}_{j}')
-            beta = model.binary_var(name=f'beta_{k}_{i}_{j}')
-            model.add_constraint(
-                X[(i,j), k] == 0 + alpha,
-                ctname=f'const_9_10a_{k}_{i}_{j}'
-            )
-            model.add_constraint(
-                L[i, k] + l[j] - L[j, k] <= M * beta,
-                ctname=f'const_9_10b_{k}_{i}_{j}'
-            )
-            model.add_constraint(
-                L[i, k] + l[j] - L[j, k] >= (-M) * beta,
-                ctname=f'const_9_10c_{k}_{i}_{j}'
-            )
-            model.add_constraint(
-                alpha + beta <= 1,
-                ctname=f'const_9_10d_{k}_{i}_{j}'
-            )
-
-    # Constraint 9.11
-    for k in K:
-        for i in P:
-            model.add_constraint(L[i, k] >= l[i], ctname=f'const_9_11_lower_{k}_{i}')
-            model.add_constraint(L[i, k] <= vehicles[k].capacity, ctname=f'const_9_11_upper_{k}_{i}')
+            binaries.append(X[k][i][j])
+            constraints.append(L[k][i] + l[j] - L[k][j] == 0)
+    model.add_indicators(binaries, constraints)
 
-    # Constraint 9.12
-    for k in K:
-        for z in D:
-            i = z - n
-            model.add_constraint(L[z, k] >= 0, ctname=f'const_9_12_lower_{k}_{i}')
-            model.add_constraint(L[z, k] <= vehicles[k].capacity - l[i], 
-                                 ctname=f'const_9_12_upper_{k}_{i}')
+    # Constraints 9.11, 9.12 and 9.13 hold through the bounds of L
 
-    # Constraint 9.13
-    for k in K:
-        model.add_constraint(L[origin, k] == 0, ctname=f'const_9_13_{k}')
+    # Constraint 9.14 (X_ijk binary) holds through the variable type of X
 
-    # Constraint 9.14
+    # Symmetry breaking between identical buses, which only differ by their ID
+    # Of each group of identical buses, a bus can only leave its origin depot
+    # for a pickup if the bus before it in the group does as well
+    groups = {}
     for k in K:
-        for (i,j) in A[k]:
-            model.add_constraint(X[(i,j), k] >= 0, ctname=f'const_9_14_{k}_{i}_{j}')
+        vehicle = vehicles[k]
+        groups.setdefault((vehicle.origin_id, vehicle.destination_id, 
+                           vehicle.capacity, vehicle.bus_type), []).append(k)
+    constraints, names = [], []
+    for group in groups.values():
+        for k1, k2 in zip(group, group[1:]):
+            constraints.append(
+                model.sum_vars([X[k1][origin][j] for j in outgoing[k1][origin] if j < n]) >= 
+                model.sum_vars([X[k2][origin][j] for j in outgoing[k2][origin] if j < n]))
+            names.append(f'symmetry_{k1}_{k2}')
+    model.add_constraints(constraints, names=names)
+
+    # Requests that can not share a route are never picked up by the same bus
+    # These cuts are valid for every solution, so they are added as user cuts
+    # that the solver uses to tighten the relaxation. The pairs leave out the depots, 
+    # so they only depend on the capacity and are found once for each capacity
+    incompatible_pairs = {}
+    cuts, names = [], []
+    for k in K:
+        capacity = vehicles[k].capacity
+        if capacity not in incompatible_pairs:
+            incompatible_pairs[capacity] = get_incompatible_pairs(V_row[k], a, b, s, l, t, capacity)
+        for i, r in incompatible_pairs[capacity]:
+            cuts.append(model.sum_vars([X[k][i][j] for j in outgoing[k][i]] + 
+                                       [X[k][r][j] for j in outgoing[k][r]]) <= 1)
+            names.append(f'cut_pair_{k}_{i}_{r}')
+    if cuts:
+        model.add_user_cut_constraints(cuts, names=names)
+
+    # Warm start the solver with greedy routes, the values of T and L 
+    # are completed by the solver for the fixed arcs
+    routes = get_greedy_routes(vehicles, V_row, a, b, s, l, t, cost)
+    if routes is not None:
+        mip_start = SolveSolution(model, {X[k][i][j]: 0.0 for k in K for (i, j) in A[k]})
+        for k, route in routes.items():
+            for i, j in zip(route, route[1:]):
+                mip_start.add_var_value(X[k][i][j], 1.0)
+        model.add_mip_start(mip_start, effort_level=EffortLevel.SolveFixed)
+
+    # Setting the solver parameters given for this instance
+    for parameter_name, value in (cplex_parameters or {}).items():
+        parameter = model.parameters
+        for attribute in parameter_name.split('.'):
+            parameter = getattr(parameter, attribute)
+        parameter.set(value)
 
     print("Model Sovle Start: " + get_time())
 
@@ -431,52 +652,68 @@ def optimize_model(vehicles : Dict[int, Vehicle], requests : Dict[int, Request],
 
     trips = {k: Trip() for k in K}
 
+    # Paths are only rebuilt for chosen arcs, the same arc is often chosen by several buses
+    paths = {}
+
     if solution:
         for k in K:
-            for (i, j) in A[k]:
-                # Choosing arcs that are 1
-                var_value = solution.get_value(X[(i,j), k])
-                if var_value > 0.9:
-
-                    # Converting time to HH:MM
-                    start_time_string = "{}:{}".format(*divmod(round(solution.get_value(T[i, k])), 60))
-                    finish_time_string = "{}:{}".format(*divmod(round(solution.get_value(T[j, k])), 60))
-
-                    request_id, destination_type = get_request_id(V[k][j], n)
-
-                    status = get_status(request_id, destination_type, V_val[k][j])
-
-                    # Calculating total cost, travel_time, and distance for each bus
-                    path_cost = cost[V_val[k][i]][V_val[k][j]][k]
-                    trips[k].total_cost += path_cost
-                    path_tt = t[V_val[k][i]][V_val[k][j]]
-                    trips[k].total_travel_time += path_tt
-                    path_dist = d[V_val[k][i]][V_val[k][j]]
-                    trips[k].total_distance += path_dist
-                    
-                    movement = Movement(V[k][i], V[k][j], start_time_string,
-                                        finish_time_string, round(solution.get_value(L[i, k])),
-                                        round(solution.get_value(L[j, k])),
-                                        request_id,
-                                        shortest_paths_tt[V_val[k][i]][V_val[k][j]],
-                                        path_cost,
-                                        path_tt,
-                                        path_dist,
-                                        status)
-                    
-                    trips[k].movements[V[k][i]] = movement
-                    
-                    # Storing chosen arcs from X
-                    chosen_X[k].append((V_val[k][i], V_val[k][j]))
+            nodes = V_val[k]
+
+            # Query the values of each variable group in a single call
+            X_values = solution.get_values([X[k][i][j] for (i, j) in A[k]])
+            T_values = [round(value) for value in solution.get_values(T[k])]
+
+            # Converting all times to HH:MM at once
+            hours, minutes = np.divmod(np.asarray(T_values, dtype=np.int64), 60)
+            time_strings = [f"{hour}:{minute:02d}" 
+                            for hour, minute in zip(hours.tolist(), minutes.tolist())]
+            L_values = [round(value) for value in solution.get_values(L[k])]
+
+            # Choosing arcs that are 1, their costs, travel times and distances 
+            # are gathered from the matrices at once
+            chosen = np.flatnonzero(np.asarray(X_values) > 0.5)
+            rows = np.asarray(V_row[k])
+            chosen_u = rows[arc_i[k][chosen]]
+            chosen_v = rows[arc_j[k][chosen]]
+            path_costs = cost[chosen_u, chosen_v, k].tolist()
+            path_tts = t[chosen_u, chosen_v].tolist()
+            path_dists = d[chosen_u, chosen_v].tolist()
+
+            for index, path_cost, path_tt, path_dist in zip(chosen.tolist(), path_costs, 
+                                                            path_tts, path_dists):
+                i, j = A[k][index]
+
+                request_id, destination_type = get_request_id(V[k][j], n)
+
+                u, v = nodes[i], nodes[j]
+                status = get_status(request_id, destination_type, v)
+
+                # Calculating total cost, travel_time, and distance for each bus
+                trips[k].total_cost += path_cost
+                trips[k].total_travel_time += path_tt
+                trips[k].total_distance += path_dist
+                if (u, v) not in paths:
+                    paths[u, v] = get_path(predecessors_tt, u, v, row[u])
+                
+                movement = Movement(V[k][i], V[k][j], time_strings[i],
+                                    time_strings[j], L_values[i], L_values[j],
+                                    request_id,
+                                    paths[u, v],
+                                    path_cost,
+                                    path_tt,
+                                    path_dist,
+                                    status)
+                
+                trips[k].movements[V[k][i]] = movement
+                
+                # Storing chosen arcs from X
+                chosen_X[k].append((u, v))
 
             # Storing T values in HH:MM
-            for i in range(len(V[k])):
-                time_string = "{}:{}".format(*divmod(round(solution.get_value(T[i, k])), 60))
-                chosen_T[k].append(time_string)
+            chosen_T[k] = time_strings
 
             # Storing L values
-            for i in range(len(V[k])):
-                chosen_L[k].append(round(solution.get_value(L[i, k])))
+            chosen_L[k] = L_values
 
             # Sorting arcs based on values of (i,j)
             trips[k].sort_movements(n)